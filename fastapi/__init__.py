@@ -6,7 +6,7 @@ from app.models import (
     SchedulerState,
     ChatRequest,
 )
-from app.agent import run_agent
+from app.agent import run_agent_with_history
 
 __all__ = [
     "CalendarEvent",
@@ -15,5 +15,5 @@ __all__ = [
     "Message",
     "SchedulerState",
     "ChatRequest",
-    "run_agent",
+    "run_agent_with_history",
 ]
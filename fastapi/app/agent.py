@@ -1,13 +1,58 @@
+import asyncio
+import hashlib
+import json
+import logging
 import os
-
-from langchain_core.messages import SystemMessage
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import AsyncIterator
+
+import anyio
+import httpx
+from langchain_core.messages import AIMessage, SystemMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import StructuredTool
 from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import load_mcp_tools
+from mcp import ClientSession
+from mcp.shared.exceptions import McpError
+from mcp.types import INVALID_PARAMS, METHOD_NOT_FOUND
 from langchain_openai import ChatOpenAI
 from langgraph.prebuilt import create_react_agent
 
+from app.models import ProposedEvent
+from app.prompts import SYSTEM_PROMPT
+
+logger = logging.getLogger(__name__)
+
+MCP_SERVER_NAME = "google_calendar"
+
+# Upper bound on concurrent direct tool calls against the MCP server
+MAX_CONCURRENT_TOOL_CALLS = 5
+
+
+def _llm_http_limits() -> httpx.Limits:
+    """
+    Build the LLM client's httpx connection pool limits.
+
+    Reads LLM_MAX_CONNECTIONS, LLM_MAX_KEEPALIVE_CONNECTIONS and
+    LLM_KEEPALIVE_EXPIRY, falling back to sizes that hold up under many
+    concurrent chat users (httpx defaults to 100 / 20).
+    """
+    return httpx.Limits(
+        max_connections=int(os.getenv("LLM_MAX_CONNECTIONS", "500")),
+        max_keepalive_connections=int(
+            os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "100")
+        ),
+        keepalive_expiry=float(os.getenv("LLM_KEEPALIVE_EXPIRY", "30")),
+    )
+
+
 client = MultiServerMCPClient(
     {
-        "google_calendar": {
+        MCP_SERVER_NAME: {
             "transport": "streamable_http",  # HTTP-based remote server
             # Ensure you start your weather server on port 8000
             "url": os.getenv("GCAL_MCP_URL"),
@@ -15,69 +60,267 @@ client = MultiServerMCPClient(
     }
 )
 
-SYSTEM_PROMPT = """You are an intelligent calendar scheduling assistant. Your goal is to help users optimize their schedule for productivity AND well-being.
 
-## Your Capabilities
-- View and analyze the user's existing Google Calendar events
-- Create, modify, and remove calendar events
-- Suggest optimal time slots based on the user's preferences and existing commitments
+# Persistent MCP session, opened at app startup and shared by every tool call.
+# The session's transport runs in a task group, which must be entered and
+# exited from the same task, so a dedicated task owns it for its lifetime.
+_mcp_session: ClientSession | None = None
+_mcp_task: asyncio.Task | None = None
+_mcp_stop: asyncio.Event | None = None
+_mcp_lock = asyncio.Lock()
 
-## Scheduling Philosophy
-1. **Balance is key**: A good schedule includes focused work blocks AND rest periods
-2. **Context matters**: Consider time of day (e.g., coding in the morning vs. meetings in the afternoon)
-3. **Buffer time**: Always leave small gaps between events for transitions
-4. **User autonomy**: Present suggestions, but let the user decide
 
-## How to Handle Common Scenarios
+def _is_connection_error(e: Exception) -> bool:
+    """
+    Whether an MCP call failed because the session itself is gone (server
+    restarted, session id dropped), as opposed to a tool or argument error.
+
+    Timeouts don't count: a slow server may still complete the request.
+    """
+    if isinstance(e, McpError):
+        return e.error.code not in (
+            INVALID_PARAMS,
+            METHOD_NOT_FOUND,
+            httpx.codes.REQUEST_TIMEOUT,
+        )
+    if isinstance(e, httpx.TimeoutException):
+        return False
+    return isinstance(
+        e, (httpx.HTTPError, anyio.ClosedResourceError, anyio.BrokenResourceError)
+    )
+
 
-### When scheduling a new task (e.g., "I need 3 hours to code"):
-- Find the best available time slot considering the user's energy patterns
-- Suggest specific times with brief reasoning
-- Ask about preferences if multiple good options exist
+async def _hold_mcp_session(ready: asyncio.Future, stop: asyncio.Event):
+    """Open the MCP session, hand it to connect_mcp, and keep it open until stopped."""
+    try:
+        async with client.session(MCP_SERVER_NAME) as session:
+            ready.set_result(session)
+            await stop.wait()
+    except BaseException as e:
+        if not ready.done():
+            ready.set_exception(e)
+        elif isinstance(e, asyncio.CancelledError):
+            raise
+        else:
+            logger.warning("MCP session closed unexpectedly: %r", e)
+
+
+async def _open_mcp_session():
+    """Open the persistent MCP session. Caller must hold _mcp_lock."""
+    global _mcp_session, _mcp_task, _mcp_stop
+    ready = asyncio.get_running_loop().create_future()
+    stop = asyncio.Event()
+    task = asyncio.create_task(_hold_mcp_session(ready, stop))
+    try:
+        session = await ready
+    except BaseException:
+        await asyncio.gather(task, return_exceptions=True)
+        raise
+    _mcp_session = session
+    _mcp_task = task
+    _mcp_stop = stop
+
+
+async def _close_mcp_session():
+    """Close the MCP session and drop tools bound to it. Caller must hold _mcp_lock."""
+    global _mcp_session, _mcp_task, _mcp_stop, _tools_cache, _tools_by_name, _agent
+    if _mcp_stop is not None:
+        _mcp_stop.set()
+    if _mcp_task is not None:
+        await asyncio.gather(_mcp_task, return_exceptions=True)
+    _mcp_session = None
+    _mcp_task = None
+    _mcp_stop = None
+    _tools_cache = None
+    _tools_by_name = {}
+    _agent = None
+
+
+async def connect_mcp():
+    """Open the persistent MCP session used by the agent's tools."""
+    async with _mcp_lock:
+        if _mcp_session is None:
+            await _open_mcp_session()
+
+
+async def disconnect_mcp():
+    """Close the persistent MCP session and drop tools bound to it."""
+    async with _mcp_lock:
+        await _close_mcp_session()
+
+
+async def reconnect_mcp(stale: ClientSession | None):
+    """
+    Replace a dead MCP session with a fresh one.
 
-### When a user cancels/drops a plan:
-- Acknowledge the freed-up time
-- Ask: "Would you like to keep this time free for flexibility, fill it with another task, or use it for a break?"
-- Don't automatically fill the gap without asking
+    Args:
+        stale: The session a failed call was using; if another caller has
+            already replaced it, this is a no-op
+    """
+    async with _mcp_lock:
+        if _mcp_session is not None and _mcp_session is not stale:
+            return
+        await _close_mcp_session()
+        await _open_mcp_session()
+
+
+async def _call_mcp_tool_coroutine(name: str, arguments: dict):
+    """
+    Run an MCP tool's coroutine, reconnecting if the session died.
 
-### When a user adds a new commitment:
-- Check for conflicts with existing events
-- If conflicts exist, propose rescheduling options
-- Ask which existing events can be moved vs. which are fixed
+    Only read-only tools are retried on the new session; a mutating call such
+    as create-event may already have been applied, so its error is raised.
+    """
+    await _get_tools_cached()
+    session = _mcp_session
+    try:
+        return await _tools_by_name[name].coroutine(**arguments)
+    except Exception as e:
+        if not _is_connection_error(e):
+            raise
+        logger.warning("MCP call to %s failed, reconnecting", name, exc_info=True)
+        await reconnect_mcp(session)
+        if name not in PREFETCHABLE_TOOLS:
+            raise
+        await _get_tools_cached()
+        return await _tools_by_name[name].coroutine(**arguments)
+
+
+# Send the static system prompt as a content block marked for prompt caching.
+# OpenRouter forwards cache_control to providers that support explicit caching
+# (Anthropic, Gemini); others still get the prompt as the leading prefix, which
+# is what automatic prefix caching keys on.
+CACHED_SYSTEM_PROMPT = SystemMessage(
+    content=[
+        {
+            "type": "text",
+            "text": SYSTEM_PROMPT,
+            "cache_control": {"type": "ephemeral"},
+        }
+    ]
+)
+
+
+# Cached MCP tool list; fetching it costs an MCP handshake over HTTP
+_tools_cache: list | None = None
+_tools_by_name: dict = {}
+_tools_lock = asyncio.Lock()
+
+
+async def _get_tools_cached() -> list:
+    """Get the MCP tool list, fetching it from the server only once."""
+    global _tools_cache, _tools_by_name
+    if _tools_cache is None:
+        async with _tools_lock:
+            if _tools_cache is None:
+                # Connects lazily if the session couldn't be opened at startup
+                await connect_mcp()
+                tools = await load_mcp_tools(_mcp_session)
+                _tools_by_name = {t.name: t for t in tools}
+                _tools_cache = tools
+    return _tools_cache
+
+
+# Read-only MCP tools that are safe to start before the LLM finishes its turn
+PREFETCHABLE_TOOLS = frozenset(
+    {
+        "list-calendars",
+        "list-events",
+        "search-events",
+        "get-event",
+        "list-colors",
+        "get-freebusy",
+        "get-current-time",
+    }
+)
+
+# Run config key under which run_agent_stream passes the tool calls it started
+# while the LLM was still streaming, keyed by _prefetch_key
+PREFETCHED_CONFIG_KEY = "mcp_prefetched"
+
+
+def _prefetch_key(name: str, args: dict) -> str:
+    return f"{name}:{json.dumps(args, sort_keys=True)}"
+
+
+def _wrap_tool(tool: StructuredTool) -> StructuredTool:
+    """
+    Wrap an MCP tool for the agent.
+
+    The wrapped tool awaits a matching prefetched call if one exists, and
+    otherwise looks the tool up by name on every call so it keeps working
+    after the MCP session is reconnected.
+    """
+
+    async def call_tool(config: RunnableConfig, **arguments):
+        prefetched = config.get("configurable", {}).get(PREFETCHED_CONFIG_KEY)
+        task = None
+        if prefetched is not None:
+            task = prefetched.pop(_prefetch_key(tool.name, arguments), None)
+        if task is not None:
+            return await task
+        if tool.name not in PREFETCHABLE_TOOLS:
+            # The calendar may change, so no cached reply can be trusted
+            _response_cache.clear()
+        return await _call_mcp_tool_coroutine(tool.name, arguments)
+
+    return tool.model_copy(update={"coroutine": call_tool})
+
+
+def _maybe_prefetch(call: dict, prefetched: dict[str, asyncio.Task]):
+    """Start a streamed tool call as soon as its arguments are complete JSON."""
+    if call["started"] or call["name"] not in PREFETCHABLE_TOOLS:
+        return
+    if not call["args"].rstrip().endswith("}"):
+        return
+    try:
+        args = json.loads(call["args"])
+    except json.JSONDecodeError:
+        return
+    call["started"] = True
+    key = _prefetch_key(call["name"], args)
+    # An identical call already in flight will serve this one too
+    if key in prefetched:
+        return
+    prefetched[key] = asyncio.create_task(
+        _call_mcp_tool_coroutine(call["name"], args)
+    )
 
-### When the schedule is too packed:
-- Proactively warn: "Your schedule looks quite full. This might lead to burnout."
-- Suggest specific events that could be moved to another day
-- Recommend adding breaks or buffer time
-- Never schedule back-to-back events for more than 4 hours
 
-### When the schedule has large gaps:
-- Suggest productive activities or rest based on user's goals
-- Offer to add focus blocks, exercise, meals, or wind-down time
-- Ask about their priorities before filling gaps
+# Shared httpx client for LLM calls; reused across agent rebuilds so a
+# reconnect doesn't leave the previous pool open
+_llm_http_client: httpx.AsyncClient | None = None
 
-## Response Style
-- Be conversational but concise
-- Always explain your reasoning briefly
-- Present options rather than dictating
-- Use time formats the user can easily understand (e.g., "2:00 PM - 5:00 PM")
-- Confirm before making any changes to the calendar
-"""
+
+def _get_llm_http_client() -> httpx.AsyncClient:
+    global _llm_http_client
+    if _llm_http_client is None:
+        _llm_http_client = httpx.AsyncClient(limits=_llm_http_limits())
+    return _llm_http_client
+
+
+async def close_llm_client():
+    """Close the shared LLM httpx client."""
+    global _llm_http_client
+    if _llm_http_client is not None:
+        await _llm_http_client.aclose()
+    _llm_http_client = None
 
 
 async def create_my_agent():
-    tools = await client.get_tools()
+    tools = [_wrap_tool(t) for t in await _get_tools_cached()]
 
     llm = ChatOpenAI(
         model="google/gemini-3-flash-preview",
         api_key=os.getenv("OPENROUTER_API_KEY"),
         openai_api_base="https://openrouter.ai/api/v1",
         temperature=0.7,
+        http_async_client=_get_llm_http_client(),
     )
 
     # Initialize Gemini Flash 3.0 Preview model
 
-    agent = create_react_agent(llm, tools, prompt=SYSTEM_PROMPT)
+    agent = create_react_agent(llm, tools, prompt=CACHED_SYSTEM_PROMPT)
 
     return agent
 
@@ -94,6 +337,58 @@ async def get_agent():
     return _agent
 
 
+# In-memory LRU of agent responses, keyed on a hash of the message history.
+# Only replies produced without any tool call are stored, since those that
+# read the calendar go stale as soon as it changes; entries also expire after
+# RESPONSE_CACHE_TTL seconds.
+RESPONSE_CACHE_SIZE = 512
+RESPONSE_CACHE_TTL = 60.0
+_response_cache: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+# Replies to these depend on the current time or change the calendar, so they
+# must always reach the agent
+_UNCACHEABLE_PATTERN = re.compile(
+    r"\b(now|today|tonight|tomorrow|yesterday|add|book|cancel|create|delete|"
+    r"move|remove|reschedule|schedule|update)\b",
+    re.IGNORECASE,
+)
+
+
+def _response_cache_key(messages: list[dict]) -> str | None:
+    """Hash the message history, or return None if the reply shouldn't be cached."""
+    if not messages or _UNCACHEABLE_PATTERN.search(messages[-1].get("content", "")):
+        return None
+    payload = json.dumps(messages, sort_keys=True).encode()
+    return hashlib.blake2b(payload).hexdigest()
+
+
+def _response_cache_get(key: str) -> str | None:
+    entry = _response_cache.get(key)
+    if entry is None:
+        return None
+    expires_at, content = entry
+    if expires_at <= time.monotonic():
+        del _response_cache[key]
+        return None
+    _response_cache.move_to_end(key)
+    return content
+
+
+def _response_cache_put(key: str, content: str):
+    _response_cache[key] = (time.monotonic() + RESPONSE_CACHE_TTL, content)
+    _response_cache.move_to_end(key)
+    if len(_response_cache) > RESPONSE_CACHE_SIZE:
+        _response_cache.popitem(last=False)
+
+
+def _last_ai(result: dict) -> str | None:
+    """Return the content of the last AI message in an agent result, if any."""
+    for msg in reversed(result.get("messages", [])):
+        if isinstance(msg, AIMessage):
+            return msg.content
+    return None
+
+
 async def run_agent_with_history(messages: list[dict]) -> str:
     """
     Run the agent with conversation history.
@@ -104,50 +399,135 @@ async def run_agent_with_history(messages: list[dict]) -> str:
     Returns:
         The agent's response as a string
     """
+    key = _response_cache_key(messages)
+    if key is not None and (cached := _response_cache_get(key)) is not None:
+        return cached
+
     agent = await get_agent()
 
     result = await agent.ainvoke({"messages": messages})
 
-    # Extract the last AI message
-    if "messages" in result:
-        for msg in reversed(result["messages"]):
-            if hasattr(msg, "content") and getattr(msg, "type", None) == "ai":
-                return msg.content
+    content = _last_ai(result)
+    if content is None:
+        return "No response generated"
 
-    return "No response generated"
+    used_tools = any(isinstance(m, ToolMessage) for m in result.get("messages", []))
+    if key is not None and not used_tools:
+        _response_cache_put(key, content)
+    return content
 
 
-async def get_calendar_events(start: str, end: str) -> dict:
+async def run_agent_stream(messages: list[dict]) -> AsyncIterator[str]:
     """
-    Fetch calendar events using the MCP tools.
+    Run the agent with conversation history, streaming tokens as they arrive.
 
     Args:
-        start: Start date in ISO format
-        end: End date in ISO format
+        messages: List of message dicts with 'role' and 'content'
 
-    Returns:
-        Dict with response and raw result
+    Yields:
+        Text chunks of the agent's response as the LLM produces them
     """
+    key = _response_cache_key(messages)
+    if key is not None and (cached := _response_cache_get(key)) is not None:
+        yield cached
+        return
+
     agent = await get_agent()
 
-    prompt = f"List all calendar events between {start} and {end}. Return the events as a structured list."
+    # Read-only tool calls are started as soon as their arguments finish
+    # streaming, so MCP latency overlaps with the rest of the LLM's turn.
+    # The agent's tool node then awaits the in-flight call instead of
+    # issuing it again.
+    prefetched: dict[str, asyncio.Task] = {}
+    tool_calls: dict[int, dict] = {}
+    used_tools = False
+
+    chunks: list[str] = []
+    try:
+        async for event in agent.astream_events(
+            {"messages": messages},
+            config={"configurable": {PREFETCHED_CONFIG_KEY: prefetched}},
+            version="v2",
+        ):
+            if event["event"] == "on_chat_model_start":
+                tool_calls = {}
+                continue
+            if event["event"] != "on_chat_model_stream":
+                continue
+            chunk = event["data"]["chunk"]
+            for tool_call_chunk in chunk.tool_call_chunks:
+                used_tools = True
+                call = tool_calls.setdefault(
+                    tool_call_chunk.get("index") or 0,
+                    {"name": None, "args": "", "started": False},
+                )
+                call["name"] = call["name"] or tool_call_chunk.get("name")
+                call["args"] += tool_call_chunk.get("args") or ""
+                _maybe_prefetch(call, prefetched)
+            # Tool-call chunks carry no text content
+            if chunk.content:
+                chunks.append(chunk.content)
+                yield chunk.content
+    finally:
+        # Drop speculative calls the agent never used
+        for task in prefetched.values():
+            if task.done() and not task.cancelled():
+                task.exception()
+            else:
+                task.cancel()
+
+    # Only cache replies that streamed to completion without reading tools
+    if key is not None and chunks and not used_tools:
+        _response_cache_put(key, "".join(chunks))
+
+
+async def _call_mcp_tool(name: str, args: dict) -> dict:
+    """
+    Invoke an MCP tool directly, without going through the LLM.
+
+    Args:
+        name: MCP tool name (e.g. 'create-event')
+        args: Tool arguments
+
+    Returns:
+        The tool's structured JSON response
+    """
+    content, _ = await _call_mcp_tool_coroutine(name, args)
+    return json.loads(content)
+
 
-    result = await agent.ainvoke({"messages": [{"role": "user", "content": prompt}]})
+def _mcp_datetime(value: datetime) -> str:
+    """Format a datetime the way the MCP server's ISO 8601 validation expects."""
+    # The server rejects fractional seconds
+    return value.isoformat(timespec="seconds")
 
-    # The agent will use MCP tools to fetch events
-    if "messages" in result:
-        for msg in reversed(result["messages"]):
-            if hasattr(msg, "content") and getattr(msg, "type", None) == "ai":
-                return {"response": msg.content, "raw": result}
 
-    return {"response": "", "raw": result}
+async def get_calendar_events(start: datetime, end: datetime) -> dict:
+    """
+    Fetch calendar events by calling the MCP list-events tool directly.
+
+    Args:
+        start: Start of the range
+        end: End of the range
+
+    Returns:
+        The list-events response, with the events under 'events'
+    """
+    return await _call_mcp_tool(
+        "list-events",
+        {
+            "calendarId": "primary",
+            "timeMin": _mcp_datetime(start),
+            "timeMax": _mcp_datetime(end),
+        },
+    )
 
 
 async def create_calendar_event(
     summary: str, start: str, end: str, description: str = ""
 ) -> dict:
     """
-    Create a calendar event using the MCP tools.
+    Create a calendar event by calling the MCP create-event tool directly.
 
     Args:
         summary: Event title/summary
@@ -156,19 +536,40 @@ async def create_calendar_event(
         description: Optional event description
 
     Returns:
-        Dict with response and raw result
+        The create-event response, with the created event under 'event'
     """
-    agent = await get_agent()
-
-    prompt = f"Create a calendar event with title '{summary}' starting at {start} and ending at {end}."
+    args = {"calendarId": "primary", "summary": summary, "start": start, "end": end}
     if description:
-        prompt += f" Description: {description}"
+        args["description"] = description
+
+    return await _call_mcp_tool("create-event", args)
+
 
-    result = await agent.ainvoke({"messages": [{"role": "user", "content": prompt}]})
+async def create_calendar_events_batch(
+    events: list[ProposedEvent],
+) -> list[dict | BaseException]:
+    """
+    Create several calendar events in one pass over the shared MCP session.
+
+    The MCP server has no batch tool, so this issues the create-event calls
+    directly (no agent, no system prompt prefill) with bounded concurrency.
 
-    if "messages" in result:
-        for msg in reversed(result["messages"]):
-            if hasattr(msg, "content") and getattr(msg, "type", None) == "ai":
-                return {"response": msg.content, "raw": result}
+    Args:
+        events: Proposed events to commit
 
-    return {"response": "", "raw": result}
+    Returns:
+        For each event, in order, the create-event response or the exception
+        raised while creating it
+    """
+    _response_cache.clear()
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_TOOL_CALLS)
+
+    async def create(event: ProposedEvent) -> dict:
+        async with semaphore:
+            return await create_calendar_event(
+                event.title, _mcp_datetime(event.start), _mcp_datetime(event.end)
+            )
+
+    return await asyncio.gather(
+        *(create(e) for e in events), return_exceptions=True
+    )
@@ -1,8 +1,12 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 
+import msgspec
+
 
 class CalendarEvent(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     id: str
     title: str
     start: datetime
@@ -10,6 +14,8 @@ class CalendarEvent(BaseModel):
 
 
 class ProposedEvent(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     id: str
     task_id: str
     title: str
@@ -20,6 +26,8 @@ class ProposedEvent(BaseModel):
 
 
 class Task(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     id: str
     title: str
     duration: int  # minutes
@@ -27,6 +35,8 @@ class Task(BaseModel):
 
 
 class Message(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     id: str
     role: str  # user | assistant
     content: str
@@ -41,3 +51,49 @@ class SchedulerState(BaseModel):
 class ChatRequest(BaseModel):
     messages: list[Message]
     proposal_state: SchedulerState
+
+
+# msgspec mirrors of the request payload models: decoding + validating the
+# chat POST body (which carries the whole SchedulerState) with msgspec is
+# several times faster than pydantic on the request hot path.
+
+
+class CalendarEventMS(msgspec.Struct):
+    id: str
+    title: str
+    start: datetime
+    end: datetime
+
+
+class ProposedEventMS(msgspec.Struct):
+    id: str
+    task_id: str
+    title: str
+    start: datetime
+    end: datetime
+    status: str = "proposed"  # proposed | user-adjusted | committed
+    reasoning: str | None = None
+
+
+class TaskMS(msgspec.Struct):
+    id: str
+    title: str
+    duration: int  # minutes
+    deadline: datetime | None = None
+
+
+class MessageMS(msgspec.Struct):
+    id: str
+    role: str  # user | assistant
+    content: str
+
+
+class SchedulerStateMS(msgspec.Struct):
+    existing_events: list[CalendarEventMS] = []
+    tasks: list[TaskMS] = []
+    proposed_events: list[ProposedEventMS] = []
+
+
+class ChatRequestMS(msgspec.Struct):
+    messages: list[MessageMS]
+    proposal_state: SchedulerStateMS
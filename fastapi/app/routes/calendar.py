@@ -1,9 +1,9 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 from datetime import datetime
 
 from app.models import CalendarEvent, ProposedEvent
-from app.agent import get_calendar_events as fetch_events, create_calendar_event
+from app.agent import get_calendar_events as fetch_events, create_calendar_events_batch
 
 router = APIRouter()
 
@@ -17,10 +17,20 @@ class CalendarPostResponse(BaseModel):
     errors: list[str]
 
 
+def _to_calendar_event(event: dict) -> CalendarEvent:
+    """Convert a structured MCP event into a CalendarEvent."""
+    return CalendarEvent(
+        id=event["id"],
+        title=event.get("summary", ""),
+        start=event["start"].get("dateTime") or event["start"]["date"],
+        end=event["end"].get("dateTime") or event["end"]["date"],
+    )
+
+
 @router.get("/", response_model=list[CalendarEvent])
 async def get_calendar_events(
-    start: str = Query(..., description="Start date in ISO format"),
-    end: str = Query(..., description="End date in ISO format"),
+    start: datetime = Query(..., description="Start date in ISO format"),
+    end: datetime = Query(..., description="End date in ISO format"),
 ):
     """
     Fetch calendar events for a date range.
@@ -28,16 +38,44 @@ async def get_calendar_events(
     Input: start, end (ISO strings)
     Output: array of CalendarEvent
     """
-    # Parse the ISO date strings
-    start_date = datetime.fromisoformat(start.replace("Z", "+00:00"))
-    end_date = datetime.fromisoformat(end.replace("Z", "+00:00"))
-
-    # Fetch events from Google Calendar API using MCP
-    result = await fetch_events(start, end)
-    # Parse the agent's response to extract events
-    # For now, return empty array until response parsing is implemented
-    events: list[CalendarEvent] = []
+    # Fetch events from Google Calendar API using MCP. Any failure here is
+    # upstream: a tool error, an unreachable/restarting MCP server, or a
+    # response in an unexpected shape.
+    try:
+        result = await fetch_events(start, end)
+        events: list[CalendarEvent] = [
+            _to_calendar_event(event) for event in result.get("events", [])
+        ]
+    except Exception as e:
+        raise HTTPException(
+            status_code=502, detail=f"Calendar MCP server error: {e!r}"
+        )
 
     return events
 
 
+@router.post("/", response_model=CalendarPostResponse)
+async def create_calendar_events(request: CalendarPostRequest):
+    """
+    Commit proposed events to Google Calendar.
+
+    Input: proposed_events: ProposedEvent[]
+    Output: created_events: CalendarEvent[], errors: string[]
+    """
+    results = await create_calendar_events_batch(request.proposed_events)
+
+    created_events: list[CalendarEvent] = []
+    errors: list[str] = []
+    for proposed, result in zip(request.proposed_events, results):
+        if isinstance(result, BaseException):
+            errors.append(f'Failed to create "{proposed.title}": {result}')
+            continue
+        try:
+            created_events.append(_to_calendar_event(result["event"]))
+        except (KeyError, TypeError, ValueError) as e:
+            # The event was created, but the response couldn't be read back
+            errors.append(
+                f'Created "{proposed.title}" but got an unexpected response: {e!r}'
+            )
+
+    return CalendarPostResponse(created_events=created_events, errors=errors)
@@ -1,40 +1,89 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
-import uuid
-import asyncio
+import msgspec
 
-from app.models import Message, SchedulerState
-from app.agent import run_agent_with_history
+from app.models import ChatRequest, ChatRequestMS
+from app.agent import run_agent_stream
 
 router = APIRouter()
 
+# strict=False gives pydantic-style lax coercion (e.g. "30" -> 30). msgspec
+# still rejects datetimes that aren't full RFC 3339 timestamps, such as
+# date-only "2025-01-01" or "2025-01-01T10:00", which pydantic accepts.
+_chat_request_decoder = msgspec.json.Decoder(ChatRequestMS, strict=False)
 
-class ChatRequest(BaseModel):
-    messages: list[Message]
-    proposal_state: SchedulerState
+
+def _inline_refs(schema, defs: dict):
+    """Replace local '#/$defs/...' references with the definitions themselves."""
+    if isinstance(schema, dict):
+        ref = schema.get("$ref")
+        if ref is not None and ref.startswith("#/$defs/"):
+            return _inline_refs(defs[ref.removeprefix("#/$defs/")], defs)
+        return {k: _inline_refs(v, defs) for k, v in schema.items() if k != "$defs"}
+    if isinstance(schema, list):
+        return [_inline_refs(v, defs) for v in schema]
+    return schema
+
+
+# The body is decoded with msgspec rather than declared as a parameter, so
+# document it for OpenAPI from the equivalent pydantic model
+_chat_request_schema = ChatRequest.model_json_schema()
+CHAT_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "application/json": {
+            "schema": _inline_refs(
+                _chat_request_schema, _chat_request_schema.get("$defs", {})
+            )
+        }
+    },
+}
+
+
+# Buffer tokens until a chunk is at least this many characters long or ends
+# on a sentence/line boundary, to cut per-chunk HTTP framing overhead
+STREAM_CHUNK_SIZE = 64
 
 
 async def generate_response(message_history: list[dict]):
-    """Stream the agent response word by word."""
-    # Get agent response
-    agent_response = await run_agent_with_history(message_history)
+    """Stream the agent response in small batches of tokens as the LLM generates it."""
+    buf: list[str] = []
+    buf_len = 0
+    async for token in run_agent_stream(message_history):
+        buf.append(token)
+        buf_len += len(token)
+        if buf_len >= STREAM_CHUNK_SIZE or token.endswith((".", "\n")):
+            yield "".join(buf)
+            buf = []
+            buf_len = 0
 
-    # Stream the response word by word
-    words = agent_response.split(' ')
-    for word in words:
-        yield word + ' '
-        await asyncio.sleep(0.02)  # Small delay for streaming effect
+    if buf:
+        yield "".join(buf)
 
 
-@router.post("/") #localhost:8000/api/chat
-async def chat(request: ChatRequest):
+@router.post("/", openapi_extra={"requestBody": CHAT_REQUEST_BODY}) #localhost:8000/api/chat
+async def chat(raw_request: Request):
     """
     Handle chat messages with the scheduling agent.
 
     Input: messages: Message[], proposalState: SchedulerState
     Output: Streaming text response
     """
+    # Decode and validate the body with msgspec instead of pydantic
+    try:
+        request = _chat_request_decoder.decode(await raw_request.body())
+    # Errors keep FastAPI's list-of-errors 422 shape
+    except msgspec.ValidationError as e:
+        raise HTTPException(
+            status_code=422,
+            detail=[{"loc": ["body"], "msg": str(e), "type": "value_error"}],
+        )
+    except msgspec.DecodeError as e:
+        raise HTTPException(
+            status_code=422,
+            detail=[{"loc": ["body"], "msg": str(e), "type": "json_invalid"}],
+        )
+
     # Convert Message objects to dict format expected by agent
     message_history = [
         {"role": msg.role, "content": msg.content}
@@ -1,11 +1,16 @@
+import logging
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from dotenv import load_dotenv
 
+from app.agent import close_llm_client, connect_mcp, disconnect_mcp, get_agent
 from app.routes import calendar, chat
 
 load_dotenv("app/.env")
 
+logger = logging.getLogger(__name__)
+
 app = FastAPI(title="Schedule Optimizer API")
 
 app.add_middleware(
@@ -16,5 +21,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.on_event("startup")
+async def _connect_mcp():
+    try:
+        await connect_mcp()
+        # Build the agent (tool list, LLM client, graph) before the first request
+        await get_agent()
+    except Exception:
+        # Keep serving; the MCP session is opened on first use instead
+        logger.exception("Could not connect to the MCP server at startup")
+
+
+@app.on_event("shutdown")
+async def _disconnect_mcp():
+    await disconnect_mcp()
+    await close_llm_client()
+
+
 app.include_router(calendar.router, prefix="/api/calendar", tags=["calendar"])
 app.include_router(chat.router, prefix="/api/chat", tags=["chat"])